@@ -3,16 +3,46 @@ Music Recommendation System using Spotify API
 This program asks what you're currently listening to and recommends similar songs.
 """
 
+import atexit
+import hashlib
+import json
 import os
+import sqlite3
+import sys
+import threading
+import time
 import warnings
 import logging
-from dotenv import load_dotenv
+import operator
+from collections import Counter, deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from typing import TYPE_CHECKING
 
-try:
-    import spotipy
-    from spotipy.oauth2 import SpotifyClientCredentials
+if TYPE_CHECKING:
     import requests
-except ModuleNotFoundError:
+
+# Suppress warnings and excessive logging
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+logging.getLogger('spotipy').setLevel(logging.CRITICAL)
+
+# C-level field getters for the per-artist hot loops
+_name_of = operator.itemgetter('name')
+_id_of = operator.itemgetter('id')
+
+# Console layout strings, built once
+_BANNER = "=" * 60
+_SEP = "-" * 60
+_WELCOME = (
+    f"{_BANNER}\n"
+    "🎵 MUSIC RECOMMENDATION SYSTEM 🎵\n"
+    f"{_BANNER}\n"
+    "Get personalized music recommendations based on what you're listening to!"
+)
+
+
+def _print_install_help() -> None:
+    """Explain how to get the dependencies when spotipy can't be imported"""
     print("❌ The 'spotipy' package is not installed in the Python interpreter you're using.")
     print()
     print("If you use the project's virtual environment, activate it in PowerShell:")
@@ -23,14 +53,33 @@ except ModuleNotFoundError:
     print()
     print("After activating the venv, install dependencies if needed:")
     print(r"    pip install -r requirements.txt")
-    raise
 
-# Load environment variables from .env file
-load_dotenv()
 
-# Suppress warnings and excessive logging
-warnings.filterwarnings('ignore', category=DeprecationWarning)
-logging.getLogger('spotipy').setLevel(logging.CRITICAL)
+class _RateLimiter:
+    """Thread-safe sliding-window limiter allowing max_calls per period seconds
+
+    _call() takes a slot for each API call's first send, and the session's
+    retry policy takes another before every resend, so retries are throttled too.
+    """
+    
+    def __init__(self, max_calls: int, period: float) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Block until another call fits in the window, then record it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
 
 
 class MusicRecommender:
@@ -41,10 +90,44 @@ class MusicRecommender:
     SEARCH_LIMIT = 5
     GENRE_ARTIST_LIMIT = 50
     MAX_GENRES = 3
+    MAX_SEED_GENRES = 5
+    MAX_RECOMMENDATIONS = 100
+    MAX_CONCURRENT_REQUESTS = 8
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 20
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    MAX_BACKOFF = 60
+    RATE_LIMIT_CALLS = 50
+    RATE_LIMIT_PERIOD = 1
+    UNAVAILABLE_STATUS_CODES = (403, 404)
     COUNTRY_CODE = 'US'
+    CACHE_TTL = 3600
+    TOP_TRACKS_CACHE_TTL = 1800
+    CACHE_MAXSIZE = 1024
+    TOP_TRACKS_CACHE_MAXSIZE = 2048
+    ARTIST_BATCH_SIZE = 50
+    CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'music_recommender')
+    TOKEN_CACHE_FILE = os.path.join(CACHE_DIR, 'token.json')
+    RECOMMENDATION_CACHE_FILE = os.path.join(CACHE_DIR, 'recommendations.sqlite3')
+    RECOMMENDATION_CACHE_TTL = 86400
+    HISTORY_FILE = os.path.expanduser('~/.music_recommender_history')
+    HISTORY_LENGTH = 500
     
     def __init__(self) -> None:
         """Initialize Spotify client with credentials"""
+        # Third-party imports are deferred to here so importing the module stays cheap
+        try:
+            from dotenv import load_dotenv
+            import spotipy
+            from spotipy.oauth2 import SpotifyClientCredentials
+            from spotipy.cache_handler import MemoryCacheHandler
+        except ModuleNotFoundError:
+            _print_install_help()
+            raise
+        
+        # Load environment variables from .env file
+        load_dotenv()
+        
         client_id = os.getenv('SPOTIFY_CLIENT_ID')
         client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
         
@@ -54,34 +137,167 @@ class MusicRecommender:
                 "Get credentials at: https://developer.spotify.com/dashboard"
             )
         
-        # Authenticate with Spotify
-        auth_manager = SpotifyClientCredentials(
+        # Authenticate with Spotify, keeping the token in memory so each API
+        # call doesn't re-read a token file; a still-valid token from the
+        # previous run is reused so startup skips the token request
+        self._client_id = client_id
+        self._auth_manager = SpotifyClientCredentials(
             client_id=client_id,
-            client_secret=client_secret
+            client_secret=client_secret,
+            cache_handler=MemoryCacheHandler(token_info=self._load_cached_token())
         )
+        # One limiter shared by every thread so bursts stay under Spotify's rate limit
+        self._limiter = _RateLimiter(self.RATE_LIMIT_CALLS, self.RATE_LIMIT_PERIOD)
+        
+        # Reuse one pooled session so every API call shares keep-alive connections
+        self._session = self._build_session()
         self.sp = spotipy.Spotify(
-            client_credentials_manager=auth_manager,
-            requests_timeout=self.TIMEOUT,
-            retries=self.MAX_RETRIES
+            client_credentials_manager=self._auth_manager,
+            requests_session=self._session,
+            requests_timeout=self.TIMEOUT
         )
+        
+        # Flipped off the first time the recommendations endpoint reports it's gone
+        self._recs_available = True
+        
+        # In-process response caches, keyed by Spotify ID -> (expires_at, value)
+        self._track_cache = {}
+        self._artist_cache = {}
+        self._top_tracks_cache = {}
+        self._cache_lock = threading.Lock()
+        
+        # Shared pool for running the recommendation strategies side by side
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        # Separate single worker for speculative prefetches, so a prefetch waiting
+        # on its strategies never holds a slot the strategies need
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=1)
+        # (track_id, future) for recommendations started on the top search hit
+        self._speculative = None
+        # readline module once history is enabled, so only queries get recorded
+        self._readline = None
+        
+        # Set by close() so background work still in flight stops early
+        self._closing = threading.Event()
+    
+    def _build_session(self) -> 'requests.Session':
+        """Create an HTTP session with connection pooling and retries"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        limiter = self._limiter
+        
+        class ThrottledRetry(Retry):
+            """Retry that takes a rate-limiter slot before every resend"""
+            
+            def sleep(self, response=None):
+                super().sleep(response)
+                limiter.acquire()
+        
+        # Retry transient failures in the transport, honouring Spotify's Retry-After on 429
+        # and using capped, jittered exponential backoff for 5xx and timeouts
+        retry = ThrottledRetry(
+            total=self.MAX_RETRIES,
+            backoff_factor=1,
+            backoff_max=self.MAX_BACKOFF,
+            backoff_jitter=0.5,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        return session
+    
+    def close(self) -> None:
+        """Save the access token for the next run and release threads and connections"""
+        self._closing.set()
+        self._save_cached_token()
+        # Drop queued work; running tasks see _closing and stop at their next API call
+        self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+    
+    def _load_cached_token(self):
+        """Read the token saved by a previous run, or None if there isn't a usable one"""
+        try:
+            with open(self.TOKEN_CACHE_FILE, encoding='utf-8') as f:
+                token_info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Tokens belong to one app; ignore them if the credentials changed
+        if not isinstance(token_info, dict) or token_info.get('client_id') != self._client_id:
+            return None
+        if 'access_token' not in token_info or 'expires_at' not in token_info:
+            return None
+        return token_info
+    
+    def _save_cached_token(self) -> None:
+        """Atomically write the current token to the on-disk token cache"""
+        token_info = self._auth_manager.cache_handler.get_cached_token()
+        if not token_info:
+            return
+        
+        tmp_path = self.TOKEN_CACHE_FILE + '.tmp'
+        try:
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            # The token is a credential, so keep the file private to the user
+            with open(tmp_path, 'w', encoding='utf-8', opener=lambda path, flags: os.open(path, flags, 0o600)) as f:
+                json.dump({**token_info, 'client_id': self._client_id}, f)
+            os.replace(tmp_path, self.TOKEN_CACHE_FILE)
+        except OSError:
+            pass
+    
+    def _call(self, method, *args, **kwargs):
+        """Invoke a Spotify client method once the shared rate limiter allows it"""
+        if self._closing.is_set():
+            raise RuntimeError("MusicRecommender is closed")
+        self._limiter.acquire()
+        return method(*args, **kwargs)
     
     def search_track(self, query: str):
         """Search for a track on Spotify and let user select from results"""
-        results = self.sp.search(q=query, type='track', limit=self.SEARCH_LIMIT)
+        results = self._call(self.sp.search, q=query, type='track', limit=self.SEARCH_LIMIT)
         tracks = results['tracks']['items']
         
         if not tracks:
             return None
         
-        # Display search results
-        print("\nSearch Results:")
+        # Display search results in a single write
+        lines = ["\nSearch Results:"]
         for i, track in enumerate(tracks, 1):
-            artists = ', '.join(artist['name'] for artist in track['artists'])
-            print(f"{i}. {track['name']} by {artists}")
+            artists = self._track_artists_str(track)
+            lines.append(f"{i}. {track['name']} by {artists}")
+        self._write_lines(lines)
+        
+        # Most users pick the top hit, so start on its recommendations while they choose
+        self._start_speculative(tracks[0]['id'])
         
         # Let user choose
         return self._get_user_track_choice(tracks)
     
+    def _start_speculative(self, track_id: str) -> None:
+        """Begin fetching recommendations for a track the user is likely to pick"""
+        self._take_speculative(None)
+        future = self._prefetch_pool.submit(self.get_recommendations, track_id, 10, set())
+        self._speculative = (track_id, future)
+    
+    def _take_speculative(self, track_id):
+        """Return the speculative fetch if it was for track_id, cancelling it otherwise"""
+        speculative, self._speculative = self._speculative, None
+        if speculative is None:
+            return None
+        speculative_id, future = speculative
+        if speculative_id == track_id:
+            return future
+        future.cancel()
+        return None
+    
     def _get_user_track_choice(self, tracks: list):
         """Get user's track selection from search results"""
         while True:
@@ -99,10 +315,63 @@ class MusicRecommender:
                 return None
     
     def get_recommendations(self, track_id: str, limit: int = 10, exclude_track_ids: set = None) -> list:
-        """Get recommendations based on a seed track with fallback strategies"""
+        """Get recommendations based on a seed track, reusing results saved by recent runs"""
         if exclude_track_ids is None:
             exclude_track_ids = set()
         
+        key = self._recommendation_cache_key(track_id, limit, exclude_track_ids)
+        cached = self._load_cached_recommendations(key)
+        if cached is not None:
+            return cached
+        
+        recommendations = self._find_recommendations(track_id, limit, exclude_track_ids)
+        # Short or interrupted results may come from timeouts or failed calls, so don't keep them
+        if len(recommendations) >= limit and not self._closing.is_set():
+            self._save_cached_recommendations(key, recommendations)
+        return recommendations
+    
+    def _recommendation_cache_key(self, track_id: str, limit: int, exclude_track_ids: set) -> str:
+        """Build a key that is stable across runs (unlike hash() of a set of strings)"""
+        excluded = hashlib.sha1(','.join(sorted(exclude_track_ids)).encode('utf-8')).hexdigest()
+        return f"{track_id}:{limit}:{excluded}"
+    
+    def _open_recommendation_cache(self):
+        """Open the on-disk recommendation cache, creating it if needed"""
+        os.makedirs(self.CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(self.RECOMMENDATION_CACHE_FILE, timeout=self.TIMEOUT)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS recommendations "
+            "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, tracks TEXT NOT NULL)"
+        )
+        return conn
+    
+    def _load_cached_recommendations(self, key: str):
+        """Return recommendations saved for key that haven't expired, or None"""
+        try:
+            with closing(self._open_recommendation_cache()) as conn:
+                row = conn.execute(
+                    "SELECT tracks FROM recommendations WHERE key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, OSError, ValueError):
+            return None
+    
+    def _save_cached_recommendations(self, key: str, tracks: list) -> None:
+        """Save recommendations for key, pruning expired entries"""
+        now = time.time()
+        try:
+            with closing(self._open_recommendation_cache()) as conn, conn:
+                conn.execute("DELETE FROM recommendations WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO recommendations (key, expires_at, tracks) VALUES (?, ?, ?)",
+                    (key, now + self.RECOMMENDATION_CACHE_TTL, json.dumps(tracks))
+                )
+        except (sqlite3.Error, OSError):
+            pass
+    
+    def _find_recommendations(self, track_id: str, limit: int, exclude_track_ids: set) -> list:
+        """Get recommendations based on a seed track with fallback strategies"""
         track_info = self._fetch_track_with_retry(track_id)
         
         if not track_info:
@@ -111,95 +380,171 @@ class MusicRecommender:
         # Get the original artist to filter duplicates
         original_artist_ids = [artist['id'] for artist in track_info.get('artists', [])]
         
-        # First, try to get any recommendations at all
-        all_tracks = []
+        # Run all strategies at once and keep the first one that still has enough
+        # tracks after diversity filtering (a raw count can be all seed-artist tracks)
         strategies = [
-            ('related-artists', self._try_related_artists_tracks),  # Try this FIRST for diversity
-            ('track-based', self._try_track_recommendations),
-            ('artist-based', self._try_artist_recommendations)
+            self._try_related_artists_tracks,  # Preferred for diversity, but often the slowest
+            self._try_track_recommendations,
+            self._try_artist_recommendations
+        ]
+        futures = [
+            self._pool.submit(strategy, track_info, track_id, 50)  # Request 50 tracks for better filtering
+            for strategy in strategies
         ]
         
-        for strategy_name, strategy in strategies:
-            try:
-                tracks = strategy(track_info, track_id, 50)  # Request 50 tracks for better filtering
-                if tracks and len(tracks) >= limit:
-                    all_tracks = tracks
-                    break  # Use first successful strategy with enough tracks
-            except Exception as e:
-                continue
-        
-        if not all_tracks:
-            return []
+        best = []
+        try:
+            for future in as_completed(futures, timeout=self.TIMEOUT):
+                try:
+                    tracks = future.result()
+                except Exception:
+                    continue
+                if not tracks:
+                    continue
+                
+                # Filter to get one track per artist, excluding original artist and
+                # tracks we've already shown
+                filtered = self._filter_diverse_artists(
+                    tracks, 
+                    original_artist_ids, 
+                    limit,
+                    max_per_artist=1,
+                    exclude_track_ids=exclude_track_ids
+                )
+                if len(filtered) >= limit:
+                    return filtered[:limit]  # Use first strategy with enough usable tracks
+                if len(filtered) > len(best):
+                    best = filtered
+        except FuturesTimeoutError:
+            pass
+        finally:
+            for future in futures:
+                future.cancel()
         
-        # Filter out tracks we've already shown
-        all_tracks = [t for t in all_tracks if t['id'] not in exclude_track_ids]
+        # No strategy reached the limit; return the most usable tracks any of them gave
+        return best
+    
+    def _fetch_track_with_retry(self, track_id: str):
+        """Fetch track info, serving repeats from the cache (retries happen in the HTTP adapter)"""
+        return self._cached(
+            self._track_cache, track_id, self.CACHE_TTL, self.CACHE_MAXSIZE,
+            lambda: self._call(self.sp.track, track_id)
+        )
+    
+    def _get_artists(self, artist_ids: list) -> list:
+        """Fetch several artists, serving cached ones and batching the rest 50 per request"""
+        found = {}
+        for artist_id in dict.fromkeys(artist_ids):
+            cached = self._cache_get(self._artist_cache, artist_id)
+            if cached is not None:
+                found[artist_id] = cached
         
-        if not all_tracks:
-            return []
+        missing = [artist_id for artist_id in dict.fromkeys(artist_ids) if artist_id not in found]
+        for start in range(0, len(missing), self.ARTIST_BATCH_SIZE):
+            batch = self._call(self.sp.artists, missing[start:start + self.ARTIST_BATCH_SIZE])
+            for artist in batch.get('artists', []):
+                if artist:
+                    found[artist['id']] = artist
+                    self._cache_put(self._artist_cache, artist['id'], self.CACHE_TTL, self.CACHE_MAXSIZE, artist)
         
-        # Filter to get one track per artist, excluding original artist
-        filtered = self._filter_diverse_artists(
-            all_tracks, 
-            original_artist_ids, 
-            limit,
-            max_per_artist=1
+        return [found[artist_id] for artist_id in artist_ids if artist_id in found]
+    
+    def _get_top_tracks(self, artist_id: str) -> list:
+        """Fetch an artist's top tracks, serving repeats from the cache"""
+        return self._cached(
+            self._top_tracks_cache, artist_id, self.TOP_TRACKS_CACHE_TTL, self.TOP_TRACKS_CACHE_MAXSIZE,
+            lambda: self._call(self.sp.artist_top_tracks, artist_id, country=self.COUNTRY_CODE).get('tracks', [])
         )
-        
-        # Return whatever we got (should be 10 diverse tracks)
-        return filtered[:limit] if len(filtered) >= limit else filtered
     
-    def _fetch_track_with_retry(self, track_id: str):
-        """Fetch track info with retry logic"""
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                return self.sp.track(track_id)
-            except Exception as e:
-                if attempt == self.MAX_RETRIES - 1:
-                    raise
+    def _cached(self, cache: dict, key: str, ttl: int, maxsize: int, fetch):
+        """Return a cached value younger than ttl seconds, otherwise fetch and store it"""
+        value = self._cache_get(cache, key)
+        if value is None:
+            # Fetch outside the lock so concurrent lookups of other keys don't wait
+            value = fetch()
+            self._cache_put(cache, key, ttl, maxsize, value)
+        return value
+    
+    def _cache_get(self, cache: dict, key: str):
+        """Return the cached value for key, or None if missing or expired"""
+        entry = cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
         return None
     
+    def _cache_put(self, cache: dict, key: str, ttl: int, maxsize: int, value) -> None:
+        """Store value for ttl seconds, evicting the oldest entry when the cache is full"""
+        with self._cache_lock:
+            cache.pop(key, None)
+            if len(cache) >= maxsize:
+                # Dicts keep insertion order, so the first key is the oldest entry
+                del cache[next(iter(cache))]
+            cache[key] = (time.monotonic() + ttl, value)
+    
     def _try_track_recommendations(self, track_info, track_id, limit):
         """Try getting recommendations using track as seed"""
-        try:
-            return self.sp.recommendations(seed_tracks=[track_id], limit=min(limit, 20)).get('tracks', [])
-        except Exception:
-            # If recommendations endpoint fails, use artist's top tracks instead
+        if self._closing.is_set():
             return []
+        return self._fetch_recommendations(limit, seed_tracks=[track_id]) or []
     
     def _try_artist_recommendations(self, track_info, track_id, limit):
         """Try getting recommendations using artist as seed"""
+        if self._closing.is_set():
+            return []
         artists = track_info.get('artists', [])
         if artists:
             artist_id = artists[0].get('id')
+            tracks = self._fetch_recommendations(limit, seed_artists=[artist_id])
+            if tracks is not None:
+                return tracks
+            # Fallback to artist top tracks if recommendations fail
             try:
-                return self.sp.recommendations(seed_artists=[artist_id], limit=min(limit, 20)).get('tracks', [])
+                return self._get_top_tracks(artist_id)[:limit]
             except Exception:
-                # Fallback to artist top tracks if recommendations fail
-                try:
-                    top = self.sp.artist_top_tracks(artist_id, country=self.COUNTRY_CODE)
-                    return top.get('tracks', [])[:limit]
-                except Exception:
-                    return []
+                return []
         return []
     
+    def _fetch_recommendations(self, limit: int, **seeds):
+        """Call the recommendations endpoint, returning None if it failed or is unavailable"""
+        if not self._recs_available:
+            return None
+        try:
+            return self._call(self.sp.recommendations, limit=min(limit, self.MAX_RECOMMENDATIONS), **seeds).get('tracks', [])
+        except Exception as e:
+            # Spotify retired this endpoint for newer apps; stop calling it once that's confirmed
+            if getattr(e, 'http_status', None) in self.UNAVAILABLE_STATUS_CODES:
+                self._recs_available = False
+            return None
+    
     def _try_related_artists_tracks(self, track_info: dict, track_id: str, limit: int) -> list:
         """Get tracks from related artists for more diversity"""
+        if self._closing.is_set():
+            return []
         artists = track_info.get('artists', [])
         if not artists:
             return []
         
-        artist_id = artists[0]['id']
+        artist_ids = [artist['id'] for artist in artists]
+        artist_id = artist_ids[0]
         
         try:
-            artist_info = self.sp.artist(artist_id)
-            genres = artist_info.get('genres', [])
+            # Genre-seeded recommendations cover many artists in one request,
+            # so try them before the per-artist top-track fan-out. Genres are
+            # only looked up when the endpoint can still be used
+            if self._recs_available:
+                genres = self._get_genres(artist_ids)
+                if genres:
+                    tracks = self._fetch_recommendations(limit, seed_genres=genres[:self.MAX_SEED_GENRES])
+                    if tracks and len(tracks) >= limit:
+                        return tracks
             
-            # Try the related-artists endpoint first
+            # Otherwise use the related-artists endpoint
             try:
-                related = self.sp.artist_related_artists(artist_id)
+                related = self._call(self.sp.artist_related_artists, artist_id)
                 related_artists = related.get('artists', [])
             except Exception:
                 # Fallback: Search for artists in the same genre(s)
+                genres = self._get_genres(artist_ids)
                 related_artists = self._find_artists_by_genres(genres, artist_id, limit)
             
             # Get top track from each related artist
@@ -207,105 +552,132 @@ class MusicRecommender:
         except Exception:
             return []
     
+    def _get_genres(self, artist_ids: list) -> list:
+        """Collect the genres of the given artists in order, without duplicates"""
+        # One batched (and cached) lookup covers every credited artist
+        return list(dict.fromkeys(
+            genre
+            for artist_info in self._get_artists(artist_ids)
+            for genre in artist_info.get('genres', [])
+        ))
+    
     def _find_artists_by_genres(self, genres: list, exclude_artist_id: str, limit: int) -> list:
-        """Search for artists by genre"""
+        """Search for artists by genre with a single combined query"""
         if not genres:
             return []
         
-        related_artists = []
-        seen_artist_ids = {exclude_artist_id}
+        # One OR query covers all genres; ask for one extra to cover the excluded seed artist
+        query = ' OR '.join(f'genre:"{genre}"' for genre in genres[:self.MAX_GENRES])
+        try:
+            results = self._call(self.sp.search, q=query, type='artist', limit=min(self.GENRE_ARTIST_LIMIT, limit + 1))
+        except Exception:
+            return []
         
-        for genre in genres[:self.MAX_GENRES]:
-            try:
-                results = self.sp.search(q=genre, type='artist', limit=self.GENRE_ARTIST_LIMIT)
-                found_artists = results.get('artists', {}).get('items', [])
-                
-                for artist in found_artists:
-                    if artist['id'] not in seen_artist_ids:
-                        related_artists.append(artist)
-                        seen_artist_ids.add(artist['id'])
-                
-                if len(related_artists) >= limit * 2:
-                    break
-            except Exception:
-                continue
+        # Dict keeps search ranking order while deduplicating by ID
+        by_id = {}
+        for artist in results.get('artists', {}).get('items', []):
+            by_id.setdefault(artist['id'], artist)
+        by_id.pop(exclude_artist_id, None)
         
-        return related_artists
+        return list(by_id.values())[:limit]
     
     def _collect_tracks_from_artists(self, artists: list, limit: int) -> list:
-        """Collect one top track from each artist"""
-        tracks = []
-        for artist in artists[:limit]:
-            try:
-                top_tracks = self.sp.artist_top_tracks(artist['id'], country=self.COUNTRY_CODE)
-                artist_tracks = top_tracks.get('tracks', [])
-                if artist_tracks:
-                    tracks.append(artist_tracks[0])
-                if len(tracks) >= limit:
-                    break
-            except Exception:
-                continue
-        return tracks
+        """Collect one top track from each artist, fetching concurrently"""
+        artist_ids = [artist['id'] for artist in artists[:limit]]
+        if not artist_ids or self._closing.is_set():
+            return []
+        
+        workers = min(self.MAX_CONCURRENT_REQUESTS, len(artist_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(self._fetch_first_top_track, artist_ids)
+            # map() preserves artist order, so results match the sequential version
+            return [track for track in results if track]
     
-    def _filter_diverse_artists(self, tracks: list, original_artist_ids: list, limit: int, max_per_artist: int = 2) -> list:
+    def _fetch_first_top_track(self, artist_id: str):
+        """Fetch an artist's most popular track, or None on failure"""
+        if self._closing.is_set():
+            return None
+        try:
+            artist_tracks = self._get_top_tracks(artist_id)
+        except Exception:
+            return None
+        return artist_tracks[0] if artist_tracks else None
+    
+    def _filter_diverse_artists(self, tracks: list, original_artist_ids: list, limit: int, max_per_artist: int = 2, exclude_track_ids: set = None) -> list:
         """Filter tracks to ensure artist diversity"""
         filtered = []
-        artist_count = {}
-        original_artist_names = set()
+        append = filtered.append
+        artist_count = Counter()
+        original_ids = frozenset(original_artist_ids)
         
-        # Track original artist names to exclude them
-        for track in tracks:
-            for artist in track.get('artists', []):
-                if artist['id'] in original_artist_ids:
-                    original_artist_names.add(artist['name'])
+        # Consider the most popular candidates first so the kept tracks are the
+        # best ones rather than the first ones scanned (sorted() leaves cached lists intact)
+        tracks = sorted(tracks, key=lambda track: track.get('popularity', 0), reverse=True)
         
         for track in tracks:
-            # Get all artist names for this track
-            track_artist_names = {artist['name'] for artist in track.get('artists', [])}
-            track_artist_ids = [artist['id'] for artist in track.get('artists', [])]
+            # Skip tracks that were already shown
+            if exclude_track_ids and track['id'] in exclude_track_ids:
+                continue
+            
+            artists = track.get('artists') or ()
+            if not artists:
+                continue
+            names = tuple(map(_name_of, artists))
+            ids = tuple(map(_id_of, artists))
             
             # Skip if this is the original artist(s)
-            if any(artist_id in original_artist_ids for artist_id in track_artist_ids):
+            if not original_ids.isdisjoint(ids):
                 continue
             
-            # Check if any artist has reached the limit
-            can_add = True
-            for artist in track.get('artists', []):
-                artist_name = artist['name']
-                if artist_count.get(artist_name, 0) >= max_per_artist:
-                    can_add = False
-                    break
+            # Skip if any artist has reached the limit
+            if any(artist_count[name] >= max_per_artist for name in names):
+                continue
             
-            if can_add:
-                filtered.append(track)
-                # Increment count for all artists on this track
-                for artist in track.get('artists', []):
-                    artist_name = artist['name']
-                    artist_count[artist_name] = artist_count.get(artist_name, 0) + 1
-                
-                if len(filtered) >= limit:
-                    break
+            append(track)
+            # Increment count for all artists on this track
+            artist_count.update(names)
+            
+            if len(filtered) >= limit:
+                break
         
         return filtered
     
     def display_recommendations(self, recommendations: list) -> None:
         """Display recommended tracks in a formatted list"""
-        print("\n" + "=" * 60)
-        print("🎵 RECOMMENDED TRACKS FOR YOU 🎵")
-        print("=" * 60)
+        lines = [
+            "\n" + _BANNER,
+            "🎵 RECOMMENDED TRACKS FOR YOU 🎵",
+            _BANNER
+        ]
         
         for i, track in enumerate(recommendations, 1):
-            artists = ', '.join(artist['name'] for artist in track['artists'])
+            artists = self._track_artists_str(track)
             album = track['album']['name']
             external_url = track['external_urls']['spotify']
             
-            print(f"\n{i}. {track['name']}")
-            print(f"   Artist(s): {artists}")
-            print(f"   Album: {album}")
-            print(f"   Listen: {external_url}")
+            lines.append(f"\n{i}. {track['name']}")
+            lines.append(f"   Artist(s): {artists}")
+            lines.append(f"   Album: {album}")
+            lines.append(f"   Listen: {external_url}")
+        
+        self._write_lines(lines)
+    
+    def _track_artists_str(self, track: dict) -> str:
+        """Return the track's comma-joined artist names, computed once per track"""
+        joined = track.get('_joined_artists')
+        if joined is None:
+            joined = ', '.join(map(_name_of, track['artists']))
+            track['_joined_artists'] = joined
+        return joined
+    
+    def _write_lines(self, lines: list) -> None:
+        """Write lines to stdout in one call instead of one print() per line"""
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
     
     def run(self):
         """Main program loop"""
+        self._enable_history()
         self._print_welcome()
         
         while True:
@@ -321,15 +693,12 @@ class MusicRecommender:
             
             # Track shown recommendations to avoid duplicates
             shown_track_ids = set()
+            prefetch = self._take_speculative(track['id'])
             
             # Get and display recommendations
             while True:
                 print("\nFinding similar tracks...")
-                recommendations = self.get_recommendations(
-                    track['id'], 
-                    limit=10,
-                    exclude_track_ids=shown_track_ids
-                )
+                recommendations = self._next_recommendations(track['id'], shown_track_ids, prefetch)
                 
                 if recommendations:
                     self.display_recommendations(recommendations)
@@ -339,45 +708,94 @@ class MusicRecommender:
                     print("Sorry, couldn't find recommendations for this track.")
                     break
                 
+                # Safe to share: shown_track_ids only changes after this result is taken
+                prefetch = self._prefetch_pool.submit(
+                    self.get_recommendations,
+                    track['id'],
+                    10,
+                    shown_track_ids
+                )
+                
                 # Ask if they want 10 more
-                print("\n" + "-" * 60)
+                print("\n" + _SEP)
                 choice = input("\nWould you like 10 MORE recommendations? (yes/no): ").strip().lower()
                 if choice not in {'yes', 'y', 'yeah', 'yep'}:
+                    prefetch.cancel()
                     break
             
             if not self._should_continue():
                 print("\nThanks for using Music Recommender! 🎵")
                 break
     
+    def _next_recommendations(self, track_id: str, shown_track_ids: set, prefetch=None) -> list:
+        """Use the prefetched batch if it succeeded, otherwise fetch it now"""
+        if prefetch is not None:
+            try:
+                return prefetch.result()
+            except Exception:
+                pass  # The speculative fetch failed; retry in the foreground
+        return self.get_recommendations(
+            track_id, 
+            limit=10,
+            exclude_track_ids=shown_track_ids
+        )
+    
+    def _enable_history(self):
+        """Let the user recall earlier queries with the arrow keys across sessions"""
+        if self._readline is not None:
+            return
+        try:
+            import readline
+        except ImportError:
+            # Not available on Windows without pyreadline3; plain input() still works
+            return
+        
+        try:
+            readline.read_history_file(self.HISTORY_FILE)
+        except OSError:
+            pass
+        readline.set_history_length(self.HISTORY_LENGTH)
+        # Only search queries are added (in _get_user_query), not yes/no or track numbers
+        readline.set_auto_history(False)
+        self._readline = readline
+        atexit.register(self._save_history, readline)
+    
+    def _save_history(self, readline):
+        """Persist the query history, ignoring unwritable locations"""
+        try:
+            readline.write_history_file(self.HISTORY_FILE)
+        except OSError:
+            pass
+    
     def _print_welcome(self):
         """Print welcome message"""
-        print("=" * 60)
-        print("🎵 MUSIC RECOMMENDATION SYSTEM 🎵")
-        print("=" * 60)
-        print("Get personalized music recommendations based on what you're listening to!")
+        self._write_lines([_WELCOME])
     
     def _get_user_query(self):
         """Get search query from user"""
-        print("\n" + "-" * 60)
+        print("\n" + _SEP)
         query = input("\nWhat are you listening to right now? (song name and/or artist): ").strip()
         if not query:
             print("Please enter a song or artist name.")
+        elif self._readline is not None:
+            self._readline.add_history(query)
         return query
     
     def _display_selected_track(self, track):
         """Display the selected track"""
-        artists = ', '.join(artist['name'] for artist in track['artists'])
+        artists = self._track_artists_str(track)
         print(f"\n✓ Selected: {track['name']} by {artists}")
     
     def _should_continue(self):
         """Ask user if they want another recommendation"""
-        print("\n" + "-" * 60)
+        print("\n" + _SEP)
         choice = input("\nWould you like another recommendation? (yes/no): ").strip().lower()
         return choice in {'yes', 'y', 'yeah', 'yep'}
 
 
 def main():
     """Entry point for the music recommender application"""
+    recommender = None
     try:
         recommender = MusicRecommender()
         recommender.run()
@@ -387,6 +805,9 @@ def main():
         print("\n\nThanks for using Music Recommender! 🎵")
     except Exception as e:
         print(f"\n❌ An error occurred: {e}")
+    finally:
+        if recommender is not None:
+            recommender.close()
 
 
 if __name__ == "__main__":